@@ -1,68 +1,283 @@
 """Build execution and project synchronization."""
 
+import codecs
+import functools
+import hashlib
+import ipaddress
+import os
+import re
+import shlex
+import socket
 import subprocess
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Union
 
 from rich.console import Console
 
 from .config import Config, SlaveConfig
-from .slave import SlaveConnection
-
-BUILD_MARKERS = {
-    "Makefile": "make",
-    "CMakeLists.txt": "cmake -B build && cmake --build build",
-    "package.json": "npm install && npm run build",
-    "Cargo.toml": "cargo build --release",
-    "go.mod": "go build ./...",
-    "pyproject.toml": "pip install -e . && python -m pytest",
-    "setup.py": "pip install -e . && python -m pytest",
-    ".ci/build.sh": "bash .ci/build.sh",
-    "build.sh": "bash build.sh",
+from .slave import SlaveConnection, ssh_command
+
+_BUILD_MARKERS: tuple[tuple[str, str], ...] = (
+    ("Makefile", "make"),
+    ("CMakeLists.txt", "cmake -B build && cmake --build build"),
+    ("package.json", "npm install && npm run build"),
+    ("Cargo.toml", "cargo build --release"),
+    ("go.mod", "go build ./..."),
+    ("pyproject.toml", "pip install -e . && python -m pytest"),
+    ("setup.py", "pip install -e . && python -m pytest"),
+    (".ci/build.sh", "bash .ci/build.sh"),
+    ("build.sh", "bash build.sh"),
+)
+_BUILD_MARKER_NAMES = frozenset(marker.split("/", 1)[0] for marker, _ in _BUILD_MARKERS)
+
+OUTPUT_CHUNK_SIZE = 65536
+ANSI_DIM = "\x1b[2m"
+ANSI_NORMAL = "\x1b[22m"
+RSYNC_PROGRESS2_VERSION = (3, 1, 0)
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ci-farm"
+
+
+_CACHE_WRAPPERS = {
+    "cargo": "sccache",
+    "cmake": "ccache",
+    "make": "ccache",
 }
+CCACHE_DIR = "$HOME/.ccache-ci-farm"
 
 
 class BuildError(Exception):
     """Build failed."""
 
 
+@dataclass(frozen=True)
+class ResolvedProject:
+    """Project location resolved once and passed through the build pipeline."""
+
+    path: Path
+    name: str
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "ResolvedProject":
+        """Resolve a project path and capture its directory name."""
+        resolved = Path(path).resolve()
+        return cls(path=resolved, name=resolved.name)
+
+
+@dataclass
+class CachingHints:
+    """Compiler cache wrappers available on a slave."""
+
+    ccache: bool = False
+    sccache: bool = False
+
+    @classmethod
+    def from_tools(cls, tools: list[tuple[str, Optional[str]]]) -> "CachingHints":
+        """Build hints from ``SlaveConnection.check_tools`` results."""
+        found = {name for name, version in tools if version is not None}
+        return cls(ccache="ccache" in found, sccache="sccache" in found)
+
+    def wrap(self, command: str) -> str:
+        """Prefix a build command with the environment enabling its compiler cache."""
+        program = _command_program(command)
+        if program == "cargo" and self.sccache:
+            return f"export RUSTC_WRAPPER=sccache && {command}"
+        if program == "cmake" and self.ccache:
+            return (
+                f'export CCACHE_DIR="{CCACHE_DIR}" CMAKE_C_COMPILER_LAUNCHER=ccache '
+                f"CMAKE_CXX_COMPILER_LAUNCHER=ccache && {command}"
+            )
+        if program == "make" and self.ccache:
+            return f'export CCACHE_DIR="{CCACHE_DIR}" CC="ccache cc" CXX="ccache c++" && {command}'
+        return command
+
+
+def _command_program(command: str) -> str:
+    """Return the program name a shell command starts with."""
+    parts = command.split(maxsplit=1)
+    return parts[0] if parts else ""
+
+
 def detect_build_command(project_path: Path) -> Optional[str]:
     """Auto-detect build command based on project files."""
-    for marker, command in BUILD_MARKERS.items():
-        if (project_path / marker).exists():
+    try:
+        present = _BUILD_MARKER_NAMES.intersection(os.listdir(project_path))
+    except OSError:
+        return None
+
+    for marker, command in _BUILD_MARKERS:
+        top, _, nested = marker.partition("/")
+        if top in present and (not nested or (project_path / marker).exists()):
             return command
     return None
 
 
+def _chain_commands(commands: list[str], label: str) -> str:
+    """Join shell commands into one script that announces each and stops at the first failure.
+
+    Each command runs in its own subshell, so ``exit``, ``cd`` or variable
+    assignments in one step do not leak into the next.
+    """
+    steps = []
+    for command in commands:
+        steps.append(f"printf '%s\\n' {shlex.quote(f'{label}: {command}')}")
+        steps.append(f"( {command}\n) || exit $?")
+    return "\n".join(steps)
+
+
+def _exclude_file(patterns: list[str]) -> Path:
+    """Return an rsync exclude file for the patterns, writing it only if not cached.
+
+    Each pattern is written as an explicit ``- `` rule, so patterns starting
+    with ``#`` or ``;`` are not read as comments.
+    """
+    content = "".join(f"- {pattern}\n" for pattern in patterns)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    path = CACHE_DIR / f"exclude-{digest}.rsync-filter"
+    if not path.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def _is_lan_host(host: str) -> bool:
+    """Check whether a host resolves to a private (LAN or loopback) address."""
+    try:
+        address = socket.getaddrinfo(host, None)[0][4][0]
+        return ipaddress.ip_address(address).is_private
+    except (OSError, ValueError):
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _rsync_progress_args() -> tuple[str, ...]:
+    """Pick rsync's progress flags: ``--info=progress2`` needs rsync 3.1.0+, older builds get ``-v``."""
+    try:
+        output = subprocess.run(
+            ["rsync", "--version"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+    except OSError:
+        return ("-v",)
+
+    match = re.search(r"rsync\s+version\s+v?(\d+)\.(\d+)(?:\.(\d+))?", output)
+    if match and tuple(int(part or 0) for part in match.groups()) >= RSYNC_PROGRESS2_VERSION:
+        return ("--info=progress2",)
+    return ("-v",)
+
+
+def _splice_output(source, console: Console) -> bool:
+    """Relay a pipe to the console's file descriptor without copying through Python.
+
+    Only used when the output is not decorated (not a colour terminal). Returns
+    False without consuming anything if the kernel cannot splice to the target.
+    """
+    if not hasattr(os, "splice") or (console.is_terminal and console.color_system):
+        return False
+    try:
+        target = console.file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+    console.file.flush()
+    moved = False
+    try:
+        while os.splice(source.fileno(), target, OUTPUT_CHUNK_SIZE, flags=os.SPLICE_F_MOVE):
+            moved = True
+    except OSError:
+        if moved:
+            raise
+        return False
+    return True
+
+
+def _print_output(source, console: Console) -> None:
+    """Write a byte stream to the console file in large chunks, dimmed on colour terminals.
+
+    Chunks bypass Rich's rendering so the carriage returns of rsync's
+    ``--info=progress2`` updates reach the terminal and redraw one line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    styled = console.is_terminal and bool(console.color_system)
+    write = console.file.write
+    while True:
+        chunk = source.read(OUTPUT_CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            write(f"{ANSI_DIM}{text}{ANSI_NORMAL}" if styled else text)
+            console.file.flush()
+        if not chunk:
+            break
+
+
+def _line_printers(
+    console: Console,
+    style: Optional[str] = None,
+) -> tuple[Callable[[str], None], Callable[[str], None]]:
+    """Build stdout/stderr line callbacks for remote command output.
+
+    When the console is not a terminal (CI logs, pipes) lines are written
+    as-is, skipping Rich's markup parsing and highlighting entirely.
+    """
+    if not console.is_terminal:
+        write = console.file.write
+
+        def write_line(line: str) -> None:
+            write(f"{line}\n")
+
+        return write_line, write_line
+
+    def on_stdout(line: str) -> None:
+        console.print(f"[{style}]{line}[/{style}]" if style else line)
+
+    def on_stderr(line: str) -> None:
+        console.print(f"[red]{line}[/red]")
+
+    return on_stdout, on_stderr
+
+
 def sync_project(
-    project_path: Path,
+    project: ResolvedProject,
     slave: SlaveConfig,
     exclude: list[str],
     console: Console,
     dry_run: bool = False,
+    fast_sync: bool = True,
 ) -> str:
-    """Sync project to slave using rsync."""
-    project_name = project_path.name
-    remote_path = f"{slave.build_dir}/{project_name}"
+    """Sync project to slave using rsync.
+
+    ``fast_sync`` updates changed files in place and keeps partially
+    transferred files, so an interrupted sync resumes instead of restarting.
+    """
+    remote_path = f"{slave.build_dir}/{project.name}"
 
     exclude_args = []
-    for pattern in exclude:
-        exclude_args.extend(["--exclude", pattern])
+    if exclude:
+        exclude_args = ["--exclude-from", str(_exclude_file(exclude))]
 
-    ssh_cmd = f"ssh -p {slave.port}"
-    if slave.key:
-        ssh_cmd += f" -i {slave.key}"
+    ssh_cmd = " ".join(ssh_command(slave))
 
     rsync_cmd = [
         "rsync",
-        "-avz",
+        "-a" if _is_lan_host(slave.host) else "-az",
+        *_rsync_progress_args(),
         "--delete",
         "-e", ssh_cmd,
         *exclude_args,
-        f"{project_path}/",
+        f"{project.path}/",
         f"{slave.user}@{slave.host}:{remote_path}/",
     ]
 
+    if fast_sync:
+        rsync_cmd[1:1] = ["--partial", "--inplace"]
+
     if dry_run:
         rsync_cmd.insert(1, "--dry-run")
 
@@ -70,15 +285,13 @@ def sync_project(
 
     process = subprocess.Popen(
         rsync_cmd,
+        bufsize=0,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
     )
 
-    for line in process.stdout:
-        line = line.rstrip()
-        if line:
-            console.print(f"[dim]{line}[/dim]")
+    if not _splice_output(process.stdout, console):
+        _print_output(process.stdout, console)
 
     process.wait()
 
@@ -94,27 +307,31 @@ def run_build(
     command: str,
     timeout: int,
     console: Console,
+    hints: Optional[CachingHints] = None,
 ) -> int:
-    """Execute build command on slave."""
+    """Execute build command on slave, enabling a compiler cache when available."""
     console.print(f"\n[bold blue]Running:[/bold blue] {command}\n")
 
-    def on_stdout(line: str):
-        console.print(line)
-
-    def on_stderr(line: str):
-        console.print(f"[red]{line}[/red]")
+    if hints:
+        wrapped = hints.wrap(command)
+        if wrapped != command:
+            cache_tool = _CACHE_WRAPPERS[_command_program(command)]
+            console.print(f"[dim]Compiler cache: {cache_tool}[/dim]")
+            command = wrapped
 
+    on_stdout, on_stderr = _line_printers(console)
     return conn.exec_command(
         command,
         working_dir=remote_path,
         timeout=timeout,
         on_stdout=on_stdout,
         on_stderr=on_stderr,
+        combine_streams=not console.is_terminal,
     )
 
 
 def execute_build(
-    project_path: Path,
+    project: ResolvedProject,
     config: Config,
     slave_name: Optional[str] = None,
     build_command: Optional[str] = None,
@@ -134,7 +351,7 @@ def execute_build(
 
     command = build_command or config.project.build_command
     if not command:
-        command = detect_build_command(project_path)
+        command = detect_build_command(project.path)
 
     if not command:
         console.print("[red]Could not detect build command. Specify it in config or CLI.[/red]")
@@ -144,47 +361,60 @@ def execute_build(
 
     try:
         with SlaveConnection(slave) as conn:
-            if conn.is_busy():
-                lock_info = conn.get_lock_info()
+            busy, lock_info = conn.lock_status()
+            if busy:
                 if lock_info:
-                    project, _ = lock_info
-                    console.print(f"[red]Slave is busy with '{project}'[/red]")
+                    busy_project, _ = lock_info
+                    console.print(f"[red]Slave is busy with '{busy_project}'[/red]")
                 else:
                     console.print("[red]Slave is busy[/red]")
                 return 1
 
-            project_name = project_path.name
-            conn.acquire_lock(project_name)
+            conn.acquire_lock(project.name)
 
             try:
-                for pre_cmd in config.project.pre_sync:
-                    console.print(f"[dim]Pre-sync: {pre_cmd}[/dim]")
-                    subprocess.run(pre_cmd, shell=True, cwd=project_path, check=True)
+                if config.project.pre_sync:
+                    subprocess.run(
+                        _chain_commands(config.project.pre_sync, "Pre-sync"),
+                        shell=True,
+                        cwd=project.path,
+                        check=True,
+                    )
 
                 remote_path = sync_project(
-                    project_path,
+                    project,
                     slave,
                     config.project.exclude,
                     console,
+                    fast_sync=config.project.fast_sync,
                 )
 
+                hints = None
+                cache_tool = _CACHE_WRAPPERS.get(_command_program(command))
+                if config.project.compiler_cache and cache_tool:
+                    hints = CachingHints.from_tools(conn.check_tools([cache_tool]))
+
                 exit_code = run_build(
                     conn,
                     remote_path,
                     command,
                     config.project.timeout,
                     console,
+                    hints=hints,
                 )
 
-                if exit_code == 0:
-                    for post_cmd in config.project.post_build:
-                        console.print(f"[dim]Post-build: {post_cmd}[/dim]")
-                        conn.exec_command(
-                            post_cmd,
-                            working_dir=remote_path,
-                            on_stdout=lambda line: console.print(f"[dim]{line}[/dim]"),
-                            on_stderr=lambda line: console.print(f"[red]{line}[/red]"),
-                        )
+                if exit_code == 0 and config.project.post_build:
+                    post_script = _chain_commands(config.project.post_build, "Post-build")
+                    on_stdout, on_stderr = _line_printers(console, style="dim")
+                    post_code = conn.exec_command(
+                        f"cd {remote_path} || exit $?\n{post_script}",
+                        on_stdout=on_stdout,
+                        on_stderr=on_stderr,
+                    )
+                    if post_code != 0:
+                        console.print()
+                        console.print(f"[bold red]Post-build failed with code {post_code}[/bold red]")
+                        return post_code
 
                 console.print()
                 if exit_code == 0:
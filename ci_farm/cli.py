@@ -1,42 +1,42 @@
 """Command-line interface for CI Farm."""
 
 import argparse
+import functools
 import shlex
 import sys
 from pathlib import Path
-from typing import Optional
-
-from rich.console import Console
-from rich.table import Table
+from typing import TYPE_CHECKING, Callable, Optional
 
 from . import __version__
-from .builder import detect_build_command, execute_build
-from .config import GLOBAL_CONFIG_PATH, Config, SlaveConfig
-from .monitor import run_monitor
-from .slave import (
-    DEFAULT_CHECK_TOOLS,
-    SlaveConnection,
-    SlaveConnectionError,
-    check_slave_available,
-    find_available_slave,
-)
 
-console = Console()
+if TYPE_CHECKING:
+    from rich.console import Console
+
+MAX_STATUS_WORKERS = 32
+
+
+@functools.lru_cache(maxsize=None)
+def _get_console() -> "Console":
+    """Create the shared console on first use."""
+    from rich.console import Console
 
-KNOWN_SUBCOMMANDS = frozenset({
-    "build", "status", "add", "remove", "init", "config", "unlock", "monitor",
-})
+    return Console()
 
 
 def cmd_build(args: argparse.Namespace) -> int:
     """Execute build on a slave."""
-    project_path = Path(args.path).resolve()
+    from .builder import ResolvedProject, execute_build
+    from .config import Config
+    from .slave import find_available_slave
+
+    console = _get_console()
+    project = ResolvedProject.from_path(args.path)
 
-    if not project_path.exists():
-        console.print(f"[red]Path does not exist: {project_path}[/red]")
+    if not project.path.exists():
+        console.print(f"[red]Path does not exist: {project.path}[/red]")
         return 1
 
-    config = Config.load(project_path)
+    config = Config.load(project.path)
 
     if not config.slaves:
         console.print("[red]No slaves configured. Run 'ci add' first.[/red]")
@@ -52,7 +52,7 @@ def cmd_build(args: argparse.Namespace) -> int:
             return 1
 
     return execute_build(
-        project_path,
+        project,
         config,
         slave_name=slave_name,
         build_command=args.command,
@@ -62,6 +62,14 @@ def cmd_build(args: argparse.Namespace) -> int:
 
 def cmd_status(args: argparse.Namespace) -> int:
     """Show status of all slaves."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rich.table import Table
+
+    from .config import Config
+    from .slave import check_slave_available
+
+    console = _get_console()
     config = Config.load()
 
     if not config.slaves:
@@ -74,8 +82,10 @@ def cmd_status(args: argparse.Namespace) -> int:
     table.add_column("Status")
     table.add_column("Info", style="dim")
 
-    for slave in config.slaves:
-        available, info = check_slave_available(slave)
+    with ThreadPoolExecutor(max_workers=min(MAX_STATUS_WORKERS, len(config.slaves))) as pool:
+        results = list(pool.map(check_slave_available, config.slaves))
+
+    for slave, (available, info) in zip(config.slaves, results):
         if available:
             status = "[green]Available[/green]"
         else:
@@ -88,6 +98,9 @@ def cmd_status(args: argparse.Namespace) -> int:
 
 def _print_tools_check(tools: list[tuple[str, Optional[str]]]) -> None:
     """Display tools availability check results."""
+    from rich.table import Table
+
+    console = _get_console()
     table = Table(title="Tools Check")
     table.add_column("Tool", style="cyan")
     table.add_column("Status")
@@ -104,12 +117,15 @@ def _print_tools_check(tools: list[tuple[str, Optional[str]]]) -> None:
 
 def cmd_add(args: argparse.Namespace) -> int:
     """Add a new slave to configuration."""
+    from .config import Config, SlaveConfig
+    from .slave import DEFAULT_CHECK_TOOLS, SlaveConnection, SlaveConnectionError
+
+    console = _get_console()
     config = Config.load()
 
-    for slave in config.slaves:
-        if slave.name == args.name:
-            console.print(f"[red]Slave '{args.name}' already exists[/red]")
-            return 1
+    if config.get_slave(args.name):
+        console.print(f"[red]Slave '{args.name}' already exists[/red]")
+        return 1
 
     new_slave = SlaveConfig(
         name=args.name,
@@ -118,6 +134,7 @@ def cmd_add(args: argparse.Namespace) -> int:
         port=args.port,
         key=args.key,
         build_dir=args.build_dir,
+        backend=args.backend,
     )
 
     try:
@@ -138,7 +155,7 @@ def cmd_add(args: argparse.Namespace) -> int:
             console.print("[yellow]Use --force to add anyway[/yellow]")
             return 1
 
-    config.slaves.append(new_slave)
+    config.add_slave(new_slave)
 
     if len(config.slaves) == 1:
         config.default_slave = args.name
@@ -150,12 +167,12 @@ def cmd_add(args: argparse.Namespace) -> int:
 
 def cmd_remove(args: argparse.Namespace) -> int:
     """Remove a slave from configuration."""
-    config = Config.load()
+    from .config import Config
 
-    found = False
-    config.slaves = [s for s in config.slaves if s.name != args.name or not (found := True)]
+    console = _get_console()
+    config = Config.load()
 
-    if not found:
+    if not config.remove_slave(args.name):
         console.print(f"[red]Slave '{args.name}' not found[/red]")
         return 1
 
@@ -169,6 +186,9 @@ def cmd_remove(args: argparse.Namespace) -> int:
 
 def cmd_init(args: argparse.Namespace) -> int:
     """Initialize project-local config."""
+    from .builder import detect_build_command
+
+    console = _get_console()
     project_path = Path(args.path).resolve()
     config_path = project_path / ".ci-farm.yaml"
 
@@ -205,6 +225,12 @@ project:
 
   # Build timeout in seconds
   timeout: 3600
+
+  # Resume interrupted syncs and update changed files in place
+  fast_sync: true
+
+  # Use ccache/sccache on the slave for make, cmake and cargo builds
+  compiler_cache: true
 """
 
     config_path.write_text(content)
@@ -214,6 +240,9 @@ project:
 
 def cmd_config(args: argparse.Namespace) -> int:
     """Show current configuration."""
+    from .config import GLOBAL_CONFIG_PATH, Config
+
+    console = _get_console()
     project_path = Path(args.path).resolve() if args.path else None
     config = Config.load(project_path)
 
@@ -235,6 +264,10 @@ def cmd_config(args: argparse.Namespace) -> int:
 
 def cmd_monitor(args: argparse.Namespace) -> int:
     """Launch live monitoring dashboard."""
+    from .config import Config
+    from .monitor import run_monitor
+
+    console = _get_console()
     config = Config.load()
 
     if not config.slaves:
@@ -246,6 +279,10 @@ def cmd_monitor(args: argparse.Namespace) -> int:
 
 def cmd_unlock(args: argparse.Namespace) -> int:
     """Force unlock a slave."""
+    from .config import Config
+    from .slave import SlaveConnection
+
+    console = _get_console()
     config = Config.load()
     slave = config.get_slave(args.name)
 
@@ -269,6 +306,11 @@ def cmd_unlock(args: argparse.Namespace) -> int:
 
 def cmd_run(argv: list[str]) -> int:
     """Execute arbitrary command on a slave."""
+    from .builder import ResolvedProject, execute_build
+    from .config import Config
+    from .slave import find_available_slave
+
+    console = _get_console()
     slave_name = None
     auto = False
 
@@ -296,9 +338,9 @@ def cmd_run(argv: list[str]) -> int:
         return 1
 
     command = shlex.join(remaining)
-    project_path = Path.cwd().resolve()
+    project = ResolvedProject.from_path(Path.cwd())
 
-    config = Config.load(project_path)
+    config = Config.load(project.path)
 
     if not config.slaves:
         console.print("[red]No slaves configured. Run 'ci add' first.[/red]")
@@ -313,7 +355,7 @@ def cmd_run(argv: list[str]) -> int:
             return 1
 
     return execute_build(
-        project_path,
+        project,
         config,
         slave_name=slave_name,
         build_command=command,
@@ -363,6 +405,9 @@ def create_parser() -> argparse.ArgumentParser:
     add_parser.add_argument("--key", "-k", help="SSH key path")
     add_parser.add_argument("--build-dir", "-d", default="/tmp/ci-farm-builds",
                            help="Remote build directory")
+    add_parser.add_argument("--backend", "-b", choices=["paramiko", "openssh"],
+                           default="paramiko",
+                           help="SSH backend for running commands (default: paramiko)")
     add_parser.add_argument("--force", "-f", action="store_true",
                            help="Add even if connection fails")
 
@@ -393,6 +438,18 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+_HANDLERS: dict[str, Callable[[argparse.Namespace], int]] = {
+    "build": cmd_build,
+    "status": cmd_status,
+    "add": cmd_add,
+    "remove": cmd_remove,
+    "init": cmd_init,
+    "config": cmd_config,
+    "monitor": cmd_monitor,
+    "unlock": cmd_unlock,
+}
+
+
 def main() -> int:
     """Main entry point."""
     if len(sys.argv) < 2:
@@ -405,27 +462,9 @@ def main() -> int:
         create_parser().parse_args()
         return 0
 
-    if first_arg in KNOWN_SUBCOMMANDS:
-        parser = create_parser()
-        args = parser.parse_args()
-
-        commands = {
-            "build": cmd_build,
-            "status": cmd_status,
-            "add": cmd_add,
-            "remove": cmd_remove,
-            "init": cmd_init,
-            "config": cmd_config,
-            "monitor": cmd_monitor,
-            "unlock": cmd_unlock,
-        }
-
-        handler = commands.get(args.command)
-        if handler:
-            return handler(args)
-
-        parser.print_help()
-        return 1
+    handler = _HANDLERS.get(first_arg)
+    if handler:
+        return handler(create_parser().parse_args())
 
     return cmd_run(sys.argv[1:])
 
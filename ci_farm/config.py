@@ -1,15 +1,37 @@
 """Configuration management for CI Farm."""
 
+import copy
+import functools
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
 import yaml
 
+try:
+    from yaml import CSafeDumper as _Dumper
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+    from yaml import SafeLoader as _Loader
+
 CONFIG_FILENAME = ".ci-farm.yaml"
 GLOBAL_CONFIG_PATH = Path.home() / CONFIG_FILENAME
 
 
+@functools.lru_cache(maxsize=8)
+def _load_yaml(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML file; cached by path, mtime and size."""
+    with open(path) as f:
+        return yaml.load(f, Loader=_Loader) or {}
+
+
+def _read_yaml(path: Path) -> dict:
+    """Read a YAML file, reusing the parsed result while the file is unchanged."""
+    stat = path.stat()
+    return copy.deepcopy(_load_yaml(str(path), stat.st_mtime_ns, stat.st_size))
+
+
 @dataclass
 class SlaveConfig:
     """Configuration for a single slave device."""
@@ -21,6 +43,7 @@ class SlaveConfig:
     key: Optional[str] = None
     password: Optional[str] = None
     build_dir: str = "/tmp/ci-farm-builds"
+    backend: str = "paramiko"
 
     def __post_init__(self):
         if self.key:
@@ -49,15 +72,24 @@ class ProjectConfig:
         ".ruff_cache",
     ])
     timeout: int = 3600
+    fast_sync: bool = True
+    compiler_cache: bool = True
 
 
 @dataclass
 class Config:
     """Main configuration container."""
 
+    # Add and remove slaves through add_slave()/remove_slave() to keep the name index in sync.
     slaves: list[SlaveConfig] = field(default_factory=list)
     project: ProjectConfig = field(default_factory=ProjectConfig)
     default_slave: Optional[str] = None
+    _slave_index: dict[str, SlaveConfig] = field(
+        default_factory=dict, init=False, repr=False, compare=False,
+    )
+
+    def __post_init__(self):
+        self._reindex_slaves()
 
     @classmethod
     def load(cls, project_path: Optional[Path] = None) -> "Config":
@@ -65,25 +97,31 @@ class Config:
         config_data: dict = {}
 
         if GLOBAL_CONFIG_PATH.exists():
-            with open(GLOBAL_CONFIG_PATH) as f:
-                config_data = yaml.safe_load(f) or {}
+            config_data = _read_yaml(GLOBAL_CONFIG_PATH)
 
         if project_path:
             project_config_path = project_path / CONFIG_FILENAME
             if project_config_path.exists():
-                with open(project_config_path) as f:
-                    project_data = yaml.safe_load(f) or {}
-                    config_data = cls._merge_configs(config_data, project_data)
+                project_data = _read_yaml(project_config_path)
+                config_data = cls._merge_configs(config_data, project_data)
 
         return cls._from_dict(config_data)
 
-    @classmethod
-    def _merge_configs(cls, base: dict, override: dict) -> dict:
-        """Merge two config dictionaries, with override taking precedence."""
-        result = base.copy()
+    @staticmethod
+    def _merge_configs(base: dict, override: dict) -> dict:
+        """Merge two config dictionaries, with override taking precedence.
+
+        Config sections are at most one level deep, so nested dicts such as
+        ``project`` are merged key by key and everything else is replaced.
+        """
+        if not base:
+            return override
+
+        result = {**base}
         for key, value in override.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = cls._merge_configs(result[key], value)
+            current = result.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                result[key] = {**current, **value}
             else:
                 result[key] = value
         return result
@@ -103,6 +141,8 @@ class Config:
             post_build=project_data.get("post_build", []),
             exclude=project_data.get("exclude", ProjectConfig().exclude),
             timeout=project_data.get("timeout", 3600),
+            fast_sync=project_data.get("fast_sync", True),
+            compiler_cache=project_data.get("compiler_cache", True),
         )
 
         return cls(
@@ -117,16 +157,34 @@ class Config:
             return None
 
         if name:
-            for slave in self.slaves:
-                if slave.name == name:
-                    return slave
-            return None
+            return self._slave_index.get(name)
 
         if self.default_slave:
             return self.get_slave(self.default_slave)
 
         return self.slaves[0]
 
+    def add_slave(self, slave: SlaveConfig) -> None:
+        """Append a slave to the configuration."""
+        self.slaves.append(slave)
+        self._slave_index.setdefault(slave.name, slave)
+
+    def remove_slave(self, name: str) -> bool:
+        """Remove the first slave with the given name. Returns False if none matched."""
+        for i, slave in enumerate(self.slaves):
+            if slave.name == name:
+                del self.slaves[i]
+                self._reindex_slaves()
+                return True
+        return False
+
+    def _reindex_slaves(self) -> None:
+        """Rebuild the name -> slave index; the first slave wins on duplicate names."""
+        index: dict[str, SlaveConfig] = {}
+        for slave in self.slaves:
+            index.setdefault(slave.name, slave)
+        self._slave_index = index
+
     def save_global(self) -> None:
         """Save current configuration to global config file."""
         data = {
@@ -138,10 +196,11 @@ class Config:
                     "port": s.port,
                     "key": s.key,
                     "build_dir": s.build_dir,
+                    "backend": s.backend,
                 }
                 for s in self.slaves
             ],
             "default_slave": self.default_slave,
         }
         with open(GLOBAL_CONFIG_PATH, "w") as f:
-            yaml.dump(data, f, default_flow_style=False)
+            yaml.dump(data, f, Dumper=_Dumper, default_flow_style=False)
@@ -1,10 +1,13 @@
 """Live monitoring dashboard for CI Farm slaves."""
 
+import re
+import shlex
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
 from rich.columns import Columns
 from rich.console import Console, Group
@@ -13,7 +16,7 @@ from rich.panel import Panel
 from rich.text import Text
 
 from .config import Config, SlaveConfig
-from .slave import SlaveConnection
+from .slave import LOCK_FILE_NAME, POOL_MAX_SIZE, SlaveConnection, SSHPool
 
 BAR_WIDTH = 15
 TEMP_WARN_THRESHOLD = 60.0
@@ -21,32 +24,82 @@ TEMP_CRIT_THRESHOLD = 75.0
 USAGE_WARN_THRESHOLD = 60.0
 USAGE_CRIT_THRESHOLD = 85.0
 BYTES_IN_KB = 1024
+_UNITS = ("B", "KiB", "MiB", "GiB", "TiB")
 SECONDS_IN_DAY = 86400
 SECONDS_IN_HOUR = 3600
 SECONDS_IN_MINUTE = 60
 MILLIDEGREES_THRESHOLD = 1000.0
 MAX_PERCENTAGE = 100.0
-MIN_SLEEP = 0.1
-
-METRICS_SCRIPT = (
-    "echo '---LOADAVG---'; "
-    "cat /proc/loadavg 2>/dev/null || echo 'N/A'; "
-    "echo '---MEMINFO---'; "
-    "grep -E '^(MemTotal|MemAvailable|MemFree|Buffers|Cached):' /proc/meminfo 2>/dev/null "
-    "|| echo 'N/A'; "
-    "echo '---UPTIME---'; "
-    "cat /proc/uptime 2>/dev/null || echo 'N/A'; "
-    "echo '---TEMP---'; "
-    "cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null "
-    "|| vcgencmd measure_temp 2>/dev/null || echo 'N/A'; "
-    "echo '---DISK---'; "
-    "df -k / 2>/dev/null | tail -1 || echo 'N/A'; "
-    "echo '---UNAME---'; "
-    "uname -snrm 2>/dev/null || echo 'N/A'; "
-    "echo '---NPROC---'; "
-    "nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 'N/A'; "
-    "echo '---END---'"
-)
+MIN_COLLECT_WORKERS = 4
+METRICS_TIMEOUT = 30
+
+
+@dataclass(frozen=True)
+class _Section:
+    """Remote metrics section: shell command, refresh TTL and the fields it fills."""
+
+    command: str
+    ttl: Optional[float]  # seconds; 0 = every refresh, None = once per connection
+    fields: tuple[str, ...]
+
+
+_SECTIONS: dict[str, _Section] = {
+    "LOADAVG": _Section(
+        "cat /proc/loadavg 2>/dev/null || echo 'N/A'",
+        0,
+        ("load_1", "load_5", "load_15"),
+    ),
+    "MEMINFO": _Section(
+        "grep -E '^(MemTotal|MemAvailable|MemFree|Buffers|Cached):' /proc/meminfo 2>/dev/null "
+        "|| echo 'N/A'",
+        0,
+        ("mem_total", "mem_used"),
+    ),
+    "UPTIME": _Section(
+        "cat /proc/uptime 2>/dev/null || echo 'N/A'",
+        0,
+        ("uptime_seconds",),
+    ),
+    "LOCK": _Section(
+        "cat {lock_path} 2>/dev/null || echo 'N/A'",
+        0,
+        ("is_busy", "busy_project", "busy_duration"),
+    ),
+    "TEMP": _Section(
+        "cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null "
+        "|| vcgencmd measure_temp 2>/dev/null || echo 'N/A'",
+        5,
+        ("temperature",),
+    ),
+    "DISK": _Section(
+        "df -k / 2>/dev/null | tail -1 || echo 'N/A'",
+        60,
+        ("disk_total", "disk_used"),
+    ),
+    "UNAME": _Section(
+        "uname -snrm 2>/dev/null || echo 'N/A'",
+        None,
+        ("os_info",),
+    ),
+    "NPROC": _Section(
+        "nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 'N/A'",
+        None,
+        ("cpu_cores",),
+    ),
+}
+
+_SECTION_RE = re.compile(r"^---([A-Z]+)---$", re.MULTILINE)
+_FLOAT_RE = re.compile(r"[-+]?\d*\.?\d+")
+
+_BAR_FILLED = tuple("█" * i for i in range(BAR_WIDTH + 1))
+_BAR_EMPTY = tuple("░" * i for i in range(BAR_WIDTH + 1))
+
+# Last panel per slave name, with the displayed values it was built from.
+_slave_panels: dict[str, tuple[tuple, Panel]] = {}
+
+# Dashboard parts reused across refreshes; only the column contents change.
+_dashboard_columns = Columns([], equal=True, expand=True)
+_dashboard_footer = Text("Press Ctrl+C to exit", style="dim", justify="center")
 
 
 @dataclass
@@ -75,44 +128,48 @@ class SlaveMetrics:
     busy_duration: Optional[float] = None
 
 
+@dataclass
+class _SlaveState:
+    """Last metrics for a slave, when each section was collected and over which connection."""
+
+    conn: Optional[SlaveConnection] = None
+    last: Optional[SlaveMetrics] = None
+    collected: dict[str, float] = field(default_factory=dict)
+    pending: Optional[Future] = None
+
+
 # ---------------------------------------------------------------------------
 #  Metric collection
 # ---------------------------------------------------------------------------
 
 
-def _get_connection(
-    slave: SlaveConfig,
-    conn_cache: dict[str, SlaveConnection],
-) -> SlaveConnection:
-    """Get or create a persistent SSH connection for a slave."""
-    conn = conn_cache.get(slave.name)
-    if conn and conn.client:
-        transport = conn.client.get_transport()
-        if transport and transport.is_active():
-            return conn
-        conn.disconnect()
-
-    conn = SlaveConnection(slave)
-    conn.connect()
-    conn_cache[slave.name] = conn
-    return conn
-
-
-def _drop_connection(name: str, conn_cache: dict[str, SlaveConnection]) -> None:
-    """Close and remove a cached connection."""
-    conn = conn_cache.pop(name, None)
-    if conn:
-        try:
-            conn.disconnect()
-        except Exception:
-            pass
+def _due_sections(state: _SlaveState, now: float) -> list[str]:
+    """Return the sections whose TTL has expired since they were last collected."""
+    due: list[str] = []
+    for name, section in _SECTIONS.items():
+        last = state.collected.get(name)
+        if last is None or (section.ttl is not None and now - last >= section.ttl):
+            due.append(name)
+    return due
+
+
+def _metrics_script(sections: list[str], lock_path: str) -> str:
+    """Build a shell script printing the given sections between ``---NAME---`` markers."""
+    parts = [f"echo '---{name}---'; {_SECTIONS[name].command}; " for name in sections]
+    parts.append("echo '---END---'")
+    return "".join(parts).format(lock_path=shlex.quote(lock_path))
 
 
 def _collect_single(
     slave: SlaveConfig,
-    conn_cache: dict[str, SlaveConnection],
+    pool: SSHPool,
+    state: _SlaveState,
 ) -> SlaveMetrics:
-    """Collect metrics from a single slave over SSH."""
+    """Collect metrics from a single slave over a pooled SSH connection.
+
+    Only sections whose TTL expired are fetched; the rest are carried over
+    from the previous refresh on the same connection.
+    """
     metrics = SlaveMetrics(
         name=slave.name,
         host=slave.host,
@@ -120,48 +177,87 @@ def _collect_single(
         port=slave.port,
     )
 
+    conn = None
     try:
-        conn = _get_connection(slave, conn_cache)
-
-        output_lines: list[str] = []
-        conn.exec_command(METRICS_SCRIPT, on_stdout=output_lines.append)
-        _parse_metrics(output_lines, metrics)
-
-        if conn.is_busy():
-            metrics.is_busy = True
-            lock_info = conn.get_lock_info()
-            if lock_info:
-                metrics.busy_project = lock_info[0]
-                metrics.busy_duration = time.time() - lock_info[1]
-
+        conn = pool.acquire(slave)
+        if state.conn is not conn:
+            state.conn, state.last, state.collected = conn, None, {}
+
+        now = time.monotonic()
+        due = _due_sections(state, now)
+        script = _metrics_script(due, f"{slave.build_dir}/{LOCK_FILE_NAME}")
+
+        _, raw = conn.shell_command(script, timeout=METRICS_TIMEOUT)
+        _parse_metrics(raw, metrics)
+
+        for name, section in _SECTIONS.items():
+            if name in due:
+                state.collected[name] = now
+            elif state.last is not None:
+                for field_name in section.fields:
+                    setattr(metrics, field_name, getattr(state.last, field_name))
+        state.last = metrics
+
+        pool.release(conn)
         metrics.online = True
     except Exception as e:
         metrics.online = False
         metrics.error = str(e)
-        _drop_connection(slave.name, conn_cache)
+        state.conn = None
+        if conn is not None:
+            pool.discard(conn)
 
     return metrics
 
 
 def _collect_all(
     slaves: list[SlaveConfig],
-    conn_cache: dict[str, SlaveConnection],
+    pool: SSHPool,
+    states: list[_SlaveState],
+    executor: ThreadPoolExecutor,
+    timeout: float,
 ) -> list[SlaveMetrics]:
-    """Collect metrics from all slaves in parallel."""
+    """Collect metrics from all slaves in parallel.
+
+    ``states`` holds one entry per slave, by position. Slaves that do not
+    answer within ``timeout`` seconds are reported offline; a slave is not
+    polled again until its previous collection has finished.
+    """
     if not slaves:
         return []
 
-    with ThreadPoolExecutor(max_workers=len(slaves)) as pool:
-        futures = {
-            pool.submit(_collect_single, slave, conn_cache): slave.name
-            for slave in slaves
-        }
-        results: list[SlaveMetrics] = []
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    order = {s.name: i for i, s in enumerate(slaves)}
-    results.sort(key=lambda m: order.get(m.name, 0))
+    futures: list[Future] = []
+    for slave, state in zip(slaves, states):
+        if state.pending is None or state.pending.done():
+            state.pending = executor.submit(_collect_single, slave, pool, state)
+        futures.append(state.pending)
+
+    results: list[Optional[SlaveMetrics]] = [None] * len(slaves)
+    index = {future: i for i, future in enumerate(futures)}
+    try:
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                results[index[future]] = future.result()
+        except FuturesTimeoutError:
+            for i, (slave, future) in enumerate(zip(slaves, futures)):
+                if results[i] is not None:
+                    continue
+                if future.done():
+                    results[i] = future.result()
+                else:
+                    results[i] = SlaveMetrics(
+                        name=slave.name,
+                        host=slave.host,
+                        user=slave.user,
+                        port=slave.port,
+                        error=f"No response within {timeout:g}s",
+                    )
+    except BaseException:
+        # Interrupted (Ctrl+C): drop queued work instead of waiting for it.
+        for future in futures:
+            future.cancel()
+        raise
+
     return results
 
 
@@ -170,30 +266,21 @@ def _collect_all(
 # ---------------------------------------------------------------------------
 
 
-def _split_sections(output: list[str]) -> dict[str, list[str]]:
-    """Split raw output into named sections by ``---NAME---`` markers."""
-    sections: dict[str, list[str]] = {}
-    current: Optional[str] = None
-    for line in output:
-        stripped = line.strip()
-        if stripped.startswith("---") and stripped.endswith("---"):
-            current = stripped.strip("-")
-            sections[current] = []
-        elif current is not None:
-            sections[current].append(stripped)
-    return sections
-
-
-def _parse_metrics(output: list[str], metrics: SlaveMetrics) -> None:
-    """Parse all metric sections from raw SSH output."""
-    sections = _split_sections(output)
-    _parse_loadavg(sections.get("LOADAVG", []), metrics)
-    _parse_meminfo(sections.get("MEMINFO", []), metrics)
-    _parse_uptime(sections.get("UPTIME", []), metrics)
-    _parse_temp(sections.get("TEMP", []), metrics)
-    _parse_disk(sections.get("DISK", []), metrics)
-    _parse_uname(sections.get("UNAME", []), metrics)
-    _parse_nproc(sections.get("NPROC", []), metrics)
+def _split_sections(raw: str) -> dict[str, list[str]]:
+    """Split raw output into named sections by ``---NAME---`` marker lines."""
+    parts = _SECTION_RE.split(raw)
+    return {
+        name: body.strip().splitlines()
+        for name, body in zip(parts[1::2], parts[2::2])
+    }
+
+
+def _parse_metrics(raw: str, metrics: SlaveMetrics) -> None:
+    """Parse the metric sections present in raw SSH output."""
+    for name, lines in _split_sections(raw).items():
+        parser = _SECTION_PARSERS.get(name)
+        if parser:
+            parser(lines, metrics)
 
 
 def _parse_loadavg(lines: list[str], metrics: SlaveMetrics) -> None:
@@ -215,11 +302,9 @@ def _parse_meminfo(lines: list[str], metrics: SlaveMetrics) -> None:
     try:
         mem: dict[str, int] = {}
         for line in lines:
-            if ":" in line:
-                key, value = line.split(":", 1)
-                parts = value.strip().split()
-                if parts:
-                    mem[key.strip()] = int(parts[0]) * BYTES_IN_KB
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                mem[parts[0][:-1]] = int(parts[1]) * BYTES_IN_KB
 
         metrics.mem_total = mem.get("MemTotal", 0)
         available = mem.get("MemAvailable", 0)
@@ -246,25 +331,13 @@ def _parse_uptime(lines: list[str], metrics: SlaveMetrics) -> None:
 def _parse_temp(lines: list[str], metrics: SlaveMetrics) -> None:
     if not lines or lines[0] == "N/A":
         return
-    line = lines[0]
-    try:
-        if "temp=" in line:
-            temp_part = line.split("=", 1)[1]
-            digits: list[str] = []
-            for ch in temp_part:
-                if ch.isdigit() or ch == ".":
-                    digits.append(ch)
-                else:
-                    break
-            metrics.temperature = float("".join(digits))
-        else:
-            value = float(line)
-            if value > MILLIDEGREES_THRESHOLD:
-                metrics.temperature = value / MILLIDEGREES_THRESHOLD
-            else:
-                metrics.temperature = value
-    except (ValueError, IndexError):
-        pass
+    match = _FLOAT_RE.search(lines[0])
+    if not match:
+        return
+    value = float(match.group())
+    if value > MILLIDEGREES_THRESHOLD:
+        value /= MILLIDEGREES_THRESHOLD
+    metrics.temperature = value
 
 
 def _parse_disk(lines: list[str], metrics: SlaveMetrics) -> None:
@@ -294,6 +367,30 @@ def _parse_nproc(lines: list[str], metrics: SlaveMetrics) -> None:
         pass
 
 
+def _parse_lock(lines: list[str], metrics: SlaveMetrics) -> None:
+    if not lines or lines[0] == "N/A":
+        return
+    metrics.is_busy = True
+    metrics.busy_project = lines[0]
+    if len(lines) >= 2:
+        try:
+            metrics.busy_duration = time.time() - float(lines[1])
+        except ValueError:
+            pass
+
+
+_SECTION_PARSERS: dict[str, Callable[[list[str], SlaveMetrics], None]] = {
+    "LOADAVG": _parse_loadavg,
+    "MEMINFO": _parse_meminfo,
+    "UPTIME": _parse_uptime,
+    "TEMP": _parse_temp,
+    "DISK": _parse_disk,
+    "UNAME": _parse_uname,
+    "NPROC": _parse_nproc,
+    "LOCK": _parse_lock,
+}
+
+
 # ---------------------------------------------------------------------------
 #  Rendering helpers
 # ---------------------------------------------------------------------------
@@ -317,26 +414,20 @@ def _temp_color(temp: float) -> str:
     return "green"
 
 
-def _make_bar(percentage: float, width: int = BAR_WIDTH) -> str:
+def _make_bar(percentage: float) -> str:
     """Build a colored Rich-markup progress bar."""
     percentage = max(0.0, min(MAX_PERCENTAGE, percentage))
-    filled = int(width * percentage / MAX_PERCENTAGE)
-    empty = width - filled
+    filled = int(BAR_WIDTH * percentage / MAX_PERCENTAGE)
     color = _usage_color(percentage)
-    return f"[{color}]{'█' * filled}[/{color}][dim]{'░' * empty}[/dim]"
+    return f"[{color}]{_BAR_FILLED[filled]}[/{color}][dim]{_BAR_EMPTY[BAR_WIDTH - filled]}[/dim]"
 
 
 def _format_bytes(n: int) -> str:
     """Format a byte count as a human-readable string."""
     if n == 0:
         return "0 B"
-    units = ("B", "KiB", "MiB", "GiB", "TiB")
-    value = float(n)
-    for unit in units[:-1]:
-        if abs(value) < BYTES_IN_KB:
-            return f"{value:.1f} {unit}"
-        value /= BYTES_IN_KB
-    return f"{value:.1f} {units[-1]}"
+    scale = min(len(_UNITS) - 1, (n.bit_length() - 1) // 10)
+    return f"{n / (1 << (10 * scale)):.1f} {_UNITS[scale]}"
 
 
 def _format_uptime(seconds: float) -> str:
@@ -365,6 +456,33 @@ def _percentage(used: float, total: float) -> float:
 # ---------------------------------------------------------------------------
 
 
+def _display_key(metrics: SlaveMetrics) -> tuple:
+    """Values a slave panel is rendered from; durations at their displayed minute resolution."""
+    busy_minutes = None
+    if metrics.busy_duration is not None:
+        busy_minutes = int(metrics.busy_duration // SECONDS_IN_MINUTE)
+    return (
+        metrics.online, metrics.error, metrics.user, metrics.host, metrics.port,
+        metrics.os_info, metrics.cpu_cores,
+        metrics.load_1, metrics.load_5, metrics.load_15,
+        metrics.mem_total, metrics.mem_used, metrics.disk_total, metrics.disk_used,
+        metrics.temperature, int(metrics.uptime_seconds // SECONDS_IN_MINUTE),
+        metrics.is_busy, metrics.busy_project, busy_minutes,
+    )
+
+
+def _slave_panel(metrics: SlaveMetrics) -> Panel:
+    """Return the slave's panel, rebuilding it only when its displayed values changed."""
+    key = _display_key(metrics)
+    cached = _slave_panels.get(metrics.name)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    panel = _build_slave_panel(metrics)
+    _slave_panels[metrics.name] = (key, panel)
+    return panel
+
+
 def _build_slave_panel(metrics: SlaveMetrics) -> Panel:
     """Build a Rich Panel showing one slave's metrics."""
     lines: list[str] = []
@@ -479,10 +597,9 @@ def _build_header(all_metrics: list[SlaveMetrics], refresh_interval: int) -> Pan
 def _build_dashboard(all_metrics: list[SlaveMetrics], refresh_interval: int) -> Group:
     """Compose the full monitoring dashboard."""
     header = _build_header(all_metrics, refresh_interval)
-    panels = [_build_slave_panel(m) for m in all_metrics]
-    columns = Columns(panels, equal=True, expand=True)
-    footer = Text("Press Ctrl+C to exit", style="dim", justify="center")
-    return Group(header, "", columns, "", footer)
+    panels = [_slave_panel(m) for m in all_metrics]
+    _dashboard_columns.renderables = panels
+    return Group(header, "", _dashboard_columns, "", _dashboard_footer)
 
 
 # ---------------------------------------------------------------------------
@@ -492,28 +609,39 @@ def _build_dashboard(all_metrics: list[SlaveMetrics], refresh_interval: int) ->
 
 def run_monitor(config: Config, refresh_interval: int, console: Console) -> int:
     """Run the live monitoring dashboard with auto-refresh."""
-    conn_cache: dict[str, SlaveConnection] = {}
+    pool = SSHPool(max_size=max(len(config.slaves), POOL_MAX_SIZE))
+    states = [_SlaveState() for _ in config.slaves]
+    executor = ThreadPoolExecutor(
+        max_workers=max(MIN_COLLECT_WORKERS, len(config.slaves)),
+        thread_name_prefix="ci-farm-mon",
+    )
 
     try:
-        with Live(console=console, refresh_per_second=2, screen=True) as live:
+        with Live(console=console, auto_refresh=False, screen=True) as live:
             live.update(
-                Text("Collecting metrics...", style="dim italic", justify="center")
+                Text("Collecting metrics...", style="dim italic", justify="center"),
+                refresh=True,
             )
 
+            next_deadline = time.monotonic() + refresh_interval
             while True:
-                start = time.monotonic()
-                metrics = _collect_all(config.slaves, conn_cache)
+                metrics = _collect_all(
+                    config.slaves, pool, states, executor, timeout=refresh_interval,
+                )
                 dashboard = _build_dashboard(metrics, refresh_interval)
-                live.update(dashboard)
-                elapsed = time.monotonic() - start
-                time.sleep(max(MIN_SLEEP, refresh_interval - elapsed))
+                live.update(dashboard, refresh=True)
+
+                # Keep a fixed cadence; if a refresh overran, skip the missed ticks.
+                now = time.monotonic()
+                if now < next_deadline:
+                    time.sleep(next_deadline - now)
+                    next_deadline += refresh_interval
+                else:
+                    next_deadline = now + refresh_interval
     except KeyboardInterrupt:
         pass
     finally:
-        for conn in conn_cache.values():
-            try:
-                conn.disconnect()
-            except Exception:
-                pass
+        executor.shutdown(wait=False)
+        pool.close()
 
     return 0
@@ -1,7 +1,14 @@
 """Slave device management via SSH."""
 
+import codecs
+import os
+import select
+import selectors
 import socket
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -11,6 +18,24 @@ from .config import SlaveConfig
 
 LOCK_FILE_NAME = ".ci-farm.lock"
 CONNECTION_TIMEOUT = 10
+MAX_PROBE_WORKERS = 32
+PIPE_READ_SIZE = 65536
+RECV_BUFFER_SIZE = 262144
+SELECT_TIMEOUT = 1.0
+
+POOL_MAX_SIZE = 32
+POOL_IDLE_TTL = 300.0
+POOL_REAP_INTERVAL = 30.0
+KEEPALIVE_INTERVAL = 30
+
+SSH_BACKENDS = ("paramiko", "openssh")
+SSH_ERROR_STATUS = 255
+
+SSH_CONTROL_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%C",
+    "-o", "ControlPersist=60s",
+]
 
 DEFAULT_CHECK_TOOLS = [
     "python3",
@@ -31,13 +56,83 @@ class SlaveBusyError(Exception):
     """Slave is currently busy with another build."""
 
 
+def ssh_command(config: SlaveConfig) -> list[str]:
+    """Build the OpenSSH command line (without destination) for a slave."""
+    command = ["ssh", "-p", str(config.port), *SSH_CONTROL_OPTIONS]
+    if config.key:
+        command.extend(["-i", config.key])
+    return command
+
+
+class _LineBuffer:
+    """Decode a byte stream and hand complete lines to a callback."""
+
+    def __init__(self, callback: Optional[Callable[[str], None]]):
+        self.callback = callback
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.pending = ""
+
+    def feed(self, data: bytes) -> None:
+        if self.callback is None:
+            return
+        *lines, self.pending = (self.pending + self.decoder.decode(data)).split("\n")
+        for line in lines:
+            self.callback(line)
+
+    def flush(self) -> None:
+        if self.callback is None:
+            return
+        rest = self.pending + self.decoder.decode(b"", final=True)
+        self.pending = ""
+        if rest:
+            self.callback(rest)
+
+
+class _ByteCapture:
+    """Collect a byte stream into a single buffer."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def feed(self, data: bytes) -> None:
+        self.data += data
+
+    def flush(self) -> None:
+        pass
+
+
 class SlaveConnection:
-    """Manages SSH connection to a slave device."""
+    """Manages SSH connection to a slave device.
+
+    With the ``openssh`` backend, commands run through the system ``ssh``
+    client and share its ControlMaster socket with rsync; lock handling
+    still goes through paramiko's SFTP session.
+    """
 
-    def __init__(self, config: SlaveConfig):
+    def __init__(self, config: SlaveConfig, backend: Optional[str] = None):
         self.config = config
+        self.backend = backend or config.backend
+        if self.backend not in SSH_BACKENDS:
+            raise SlaveConnectionError(
+                f"Unknown SSH backend '{self.backend}' for {config.name} "
+                f"(expected one of: {', '.join(SSH_BACKENDS)})"
+            )
         self.client: Optional[paramiko.SSHClient] = None
-        self.sftp: Optional[paramiko.SFTPClient] = None
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._shell: Optional[paramiko.Channel] = None
+        self._shell_marker = f"CI_FARM_DONE_{os.urandom(8).hex()}"
+
+    @property
+    def sftp(self) -> paramiko.SFTPClient:
+        """SFTP session, opened on first use."""
+        if self._sftp is None:
+            try:
+                self._sftp = self.client.open_sftp()
+            except (OSError, paramiko.SSHException) as e:
+                raise SlaveConnectionError(
+                    f"Failed to open SFTP session on {self.config.name}: {e}"
+                ) from e
+        return self._sftp
 
     def connect(self) -> None:
         """Establish SSH connection to the slave."""
@@ -60,15 +155,15 @@ class SlaveConnection:
 
         try:
             self.client.connect(**connect_kwargs)
-            self.sftp = self.client.open_sftp()
         except (OSError, paramiko.SSHException, socket.timeout) as e:
             raise SlaveConnectionError(f"Failed to connect to {self.config.name}: {e}") from e
 
     def disconnect(self) -> None:
         """Close SSH connection."""
-        if self.sftp:
-            self.sftp.close()
-            self.sftp = None
+        self._close_shell()
+        if self._sftp:
+            self._sftp.close()
+            self._sftp = None
         if self.client:
             self.client.close()
             self.client = None
@@ -120,47 +215,209 @@ class SlaveConnection:
         timeout: Optional[int] = None,
         on_stdout: Optional[Callable[[str], None]] = None,
         on_stderr: Optional[Callable[[str], None]] = None,
+        combine_streams: bool = False,
+    ) -> int:
+        """Execute command on slave and stream output.
+
+        With ``combine_streams`` stderr is merged into stdout locally, as it
+        is received, and every line goes to ``on_stdout``. A command still
+        running after ``timeout`` seconds raises ``subprocess.TimeoutExpired``.
+        """
+        return self._run(
+            command,
+            working_dir,
+            timeout,
+            _LineBuffer(on_stdout),
+            _LineBuffer(on_stderr),
+            combine_streams,
+        )
+
+    def capture_command(
+        self,
+        command: str,
+        working_dir: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ) -> tuple[int, str]:
+        """Execute command on slave and return its exit status and whole stdout.
+
+        Output is collected as raw bytes and decoded once, without per-line
+        callbacks; stderr is discarded.
+        """
+        stdout = _ByteCapture()
+        exit_status = self._run(command, working_dir, timeout, stdout, _LineBuffer(None), False)
+        return exit_status, stdout.data.decode("utf-8", errors="replace")
+
+    def shell_command(self, script: str, timeout: Optional[float] = None) -> tuple[int, str]:
+        """Run a script in a persistent remote shell and return its exit status and stdout.
+
+        The shell channel is opened on first use and reused by later calls,
+        saving a channel open per command. The script runs in that shell with
+        stdin from /dev/null, so it must not ``exit``. On timeout or a dead
+        channel the shell is dropped and reopened by the next call. With the
+        ``openssh`` backend this is the same as :meth:`capture_command`.
+        """
+        if self.backend == "openssh":
+            return self.capture_command(script, timeout=timeout)
+
+        shell = self._open_shell()
+        marker = f"\n{self._shell_marker}:".encode()
+        deadline = time.monotonic() + timeout if timeout else None
+        output = bytearray()
+        scanned = 0
+
+        try:
+            shell.sendall(
+                f"{{ {script}\n}} </dev/null; printf '\\n%s:%d\\n' {self._shell_marker} \"$?\"\n"
+                .encode()
+            )
+            while True:
+                wait = SELECT_TIMEOUT
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise SlaveConnectionError(
+                            f"Shell command timed out on {self.config.name}"
+                        )
+                select.select([shell], [], [], wait)
+
+                while shell.recv_stderr_ready():
+                    shell.recv_stderr(RECV_BUFFER_SIZE)
+                while shell.recv_ready():
+                    output += shell.recv(RECV_BUFFER_SIZE)
+
+                end = output.find(marker, scanned)
+                if end >= 0:
+                    newline = output.find(b"\n", end + len(marker))
+                    if newline >= 0:
+                        status = int(output[end + len(marker):newline])
+                        return status, output[:end].decode("utf-8", errors="replace")
+                    scanned = end
+                else:
+                    scanned = max(0, len(output) - len(marker))
+
+                if shell.closed or shell.eof_received:
+                    raise SlaveConnectionError(f"Shell closed on {self.config.name}")
+        except BaseException:
+            self._close_shell()
+            raise
+
+    def _open_shell(self) -> paramiko.Channel:
+        """Return the persistent shell channel, opening it if needed."""
+        if self._shell is None or self._shell.closed:
+            shell = self.client.get_transport().open_session(timeout=CONNECTION_TIMEOUT)
+            # Not invoke_shell(): the login shell may be fish or csh; the scripts need POSIX sh.
+            shell.exec_command("exec sh")
+            self._shell = shell
+        return self._shell
+
+    def _close_shell(self) -> None:
+        if self._shell is not None:
+            try:
+                self._shell.close()
+            except Exception:
+                pass
+            self._shell = None
+
+    def _run(
+        self,
+        command: str,
+        working_dir: Optional[str],
+        timeout: Optional[int],
+        stdout,
+        stderr,
+        combine_streams: bool,
     ) -> int:
-        """Execute command on slave and stream output."""
+        """Execute command, feeding output bytes to ``stdout``/``stderr`` sinks."""
         if working_dir:
             command = f"cd {working_dir} && {command}"
 
-        _, stdout, stderr = self.client.exec_command(command, timeout=timeout)
-
-        stdout_channel = stdout.channel
-        stdout_channel.setblocking(False)
-
-        exit_status = None
-        stdout_buffer = ""
-        stderr_buffer = ""
-
-        while exit_status is None:
-            if stdout_channel.recv_ready():
-                chunk = stdout_channel.recv(1024).decode("utf-8", errors="replace")
-                stdout_buffer += chunk
-                while "\n" in stdout_buffer:
-                    line, stdout_buffer = stdout_buffer.split("\n", 1)
-                    if on_stdout:
-                        on_stdout(line)
-
-            if stdout_channel.recv_stderr_ready():
-                chunk = stdout_channel.recv_stderr(1024).decode("utf-8", errors="replace")
-                stderr_buffer += chunk
-                while "\n" in stderr_buffer:
-                    line, stderr_buffer = stderr_buffer.split("\n", 1)
-                    if on_stderr:
-                        on_stderr(line)
-
-            if stdout_channel.exit_status_ready():
-                exit_status = stdout_channel.recv_exit_status()
-            else:
-                time.sleep(0.1)
-
-        if stdout_buffer and on_stdout:
-            on_stdout(stdout_buffer)
-        if stderr_buffer and on_stderr:
-            on_stderr(stderr_buffer)
+        if self.backend == "openssh":
+            return self._exec_openssh(command, timeout, stdout, stderr, combine_streams)
+
+        channel = self.client.get_transport().open_session(timeout=CONNECTION_TIMEOUT)
+        if combine_streams:
+            channel.set_combine_stderr(True)
+        channel.exec_command(command)
+        channel.setblocking(False)
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while True:
+            wait = SELECT_TIMEOUT
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    channel.close()
+                    raise subprocess.TimeoutExpired(command, timeout)
+            select.select([channel], [], [], wait)
+
+            while channel.recv_ready():
+                stdout.feed(channel.recv(RECV_BUFFER_SIZE))
+            if not combine_streams:
+                while channel.recv_stderr_ready():
+                    stderr.feed(channel.recv_stderr(RECV_BUFFER_SIZE))
+
+            # The exit status may arrive before the last output; stop only at EOF.
+            if channel.eof_received or channel.closed:
+                if not (channel.recv_ready() or channel.recv_stderr_ready()):
+                    break
+
+        stdout.flush()
+        stderr.flush()
+        exit_status = channel.recv_exit_status()
+        channel.close()
+        return exit_status
 
+    def _exec_openssh(
+        self,
+        command: str,
+        timeout: Optional[int],
+        stdout,
+        stderr,
+        combine_streams: bool,
+    ) -> int:
+        """Execute command through the system ssh client and stream output.
+
+        Exit status 255 is ssh's own failure (connection, authentication)
+        and raises SlaveConnectionError rather than passing for a result.
+        """
+        process = subprocess.Popen(
+            [
+                *ssh_command(self.config),
+                "-o", "BatchMode=yes",
+                f"{self.config.user}@{self.config.host}",
+                command,
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT if combine_streams else subprocess.PIPE,
+        )
+        deadline = time.monotonic() + timeout if timeout else None
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ, stdout)
+            if not combine_streams:
+                selector.register(process.stderr, selectors.EVENT_READ, stderr)
+
+            while selector.get_map():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    process.kill()
+                    process.wait()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, PIPE_READ_SIZE)
+                    if data:
+                        key.data.feed(data)
+                    else:
+                        selector.unregister(key.fileobj)
+                        key.data.flush()
+
+        exit_status = process.wait()
+        if exit_status == SSH_ERROR_STATUS:
+            raise SlaveConnectionError(
+                f"ssh to {self.config.name} failed with exit status {exit_status}"
+            )
         return exit_status
 
     def check_tools(self, tools: list[str]) -> list[tuple[str, Optional[str]]]:
@@ -169,47 +426,173 @@ class SlaveConnection:
         check_script = (
             f'for tool in {tools_str}; do '
             'if command -v "$tool" > /dev/null 2>&1; then '
-            'ver=$("$tool" --version 2>&1 | head -1); '
-            'echo "FOUND:$tool:$ver"; '
-            'else echo "MISSING:$tool"; fi; done'
+            'printf \'F\\t%s\\t%s\\0\' "$tool" "$("$tool" --version 2>&1 | head -1)"; '
+            'else printf \'M\\t%s\\t\\0\' "$tool"; fi; done'
         )
 
-        output_lines: list[str] = []
-        self.exec_command(check_script, on_stdout=output_lines.append)
+        _, output = self.capture_command(check_script)
 
         results: list[tuple[str, Optional[str]]] = []
-        for line in output_lines:
-            if line.startswith("FOUND:"):
-                parts = line.split(":", 2)
-                name = parts[1] if len(parts) > 1 else ""
-                version = parts[2] if len(parts) > 2 else ""
+        for record in output.split("\0"):
+            kind, _, rest = record.partition("\t")
+            name, _, version = rest.partition("\t")
+            if kind == "F":
                 results.append((name, version))
-            elif line.startswith("MISSING:"):
-                name = line.split(":", 1)[1] if ":" in line else ""
+            elif kind == "M":
                 results.append((name, None))
 
         return results
 
     def get_lock_info(self) -> Optional[tuple[str, float]]:
         """Get information about current lock."""
+        return self.lock_status()[1]
+
+    def lock_status(self) -> tuple[bool, Optional[tuple[str, float]]]:
+        """Check the lock and read its details with a single file read."""
         lock_path = f"{self.config.build_dir}/{LOCK_FILE_NAME}"
         try:
             with self.sftp.file(lock_path, "r") as f:
                 content = f.read().decode("utf-8")
-                lines = content.strip().split("\n")
-                if len(lines) >= 2:
-                    return lines[0], float(lines[1])
         except FileNotFoundError:
+            return False, None
+
+        lines = content.strip().split("\n")
+        if len(lines) >= 2:
+            try:
+                return True, (lines[0], float(lines[1]))
+            except ValueError:
+                pass
+        return True, None
+
+
+class SSHPool:
+    """Bounded pool of reusable slave connections.
+
+    Connections are keyed by ``(host, user, port, key)`` and borrowed with
+    :meth:`acquire` / :meth:`release`. Pooled transports send SSH keepalives,
+    and a background reaper pings idle connections, closing those idle longer
+    than ``idle_ttl`` or whose transport has died. :meth:`close` also closes
+    borrowed connections, so commands still running on them fail promptly.
+    """
+
+    def __init__(
+        self,
+        max_size: int = POOL_MAX_SIZE,
+        idle_ttl: float = POOL_IDLE_TTL,
+        reap_interval: float = POOL_REAP_INTERVAL,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._idle: list[tuple[tuple, SlaveConnection, float]] = []
+        self._busy: set[SlaveConnection] = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reap_interval = reap_interval
+        self._reaper = threading.Thread(
+            target=self._reap_loop, name="ci-farm-ssh-reaper", daemon=True,
+        )
+        self._reaper.start()
+
+    @staticmethod
+    def _key(config: SlaveConfig) -> tuple:
+        return (config.host, config.user, config.port, config.key)
+
+    @staticmethod
+    def _is_alive(conn: SlaveConnection) -> bool:
+        transport = conn.client.get_transport() if conn.client else None
+        return bool(transport and transport.is_active())
+
+    def acquire(self, config: SlaveConfig) -> SlaveConnection:
+        """Borrow a connection to the slave, reusing an idle one when possible."""
+        key = self._key(config)
+        conn = None
+        with self._lock:
+            for i in range(len(self._idle) - 1, -1, -1):
+                if self._idle[i][0] == key:
+                    conn = self._idle.pop(i)[1]
+                    break
+
+            if conn is not None:
+                self._busy.add(conn)
+
+        if conn is not None:
+            if self._is_alive(conn):
+                conn.config = config
+                return conn
+            self.discard(conn)
+
+        conn = SlaveConnection(config)
+        conn.connect()
+        conn.client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+        with self._lock:
+            self._busy.add(conn)
+        if self._closed.is_set():
+            self.discard(conn)
+            raise SlaveConnectionError("Connection pool is closed")
+        return conn
+
+    def release(self, conn: SlaveConnection) -> None:
+        """Return a borrowed connection to the pool."""
+        if self._closed.is_set():
+            self.discard(conn)
+            return
+
+        evicted: list[SlaveConnection] = []
+        with self._lock:
+            self._busy.discard(conn)
+            self._idle.append((self._key(conn.config), conn, time.monotonic()))
+            while self._idle and len(self._idle) + len(self._busy) > self.max_size:
+                evicted.append(self._idle.pop(0)[1])
+        for old in evicted:
+            self.discard(old)
+
+    def discard(self, conn: SlaveConnection) -> None:
+        """Close a connection and forget it."""
+        with self._lock:
+            self._busy.discard(conn)
+        try:
+            conn.disconnect()
+        except Exception:
             pass
-        return None
+
+    def _reap_loop(self) -> None:
+        while not self._closed.wait(self._reap_interval):
+            self.reap()
+
+    def reap(self) -> None:
+        """Close expired or dead idle connections and ping the rest."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                entry for entry in self._idle
+                if now - entry[2] > self.idle_ttl or not self._is_alive(entry[1])
+            ]
+            self._idle = [entry for entry in self._idle if entry not in stale]
+            live = [conn for _, conn, _ in self._idle]
+        for _, conn, _ in stale:
+            self.discard(conn)
+        for conn in live:
+            try:
+                conn.client.get_transport().send_ignore()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        """Stop the reaper and close all pooled connections, idle or borrowed."""
+        self._closed.set()
+        with self._lock:
+            conns = [conn for _, conn, _ in self._idle] + list(self._busy)
+            self._idle = []
+        for conn in conns:
+            self.discard(conn)
 
 
 def check_slave_available(config: SlaveConfig) -> tuple[bool, Optional[str]]:
     """Check if slave is available for builds."""
     try:
         with SlaveConnection(config) as conn:
-            if conn.is_busy():
-                lock_info = conn.get_lock_info()
+            busy, lock_info = conn.lock_status()
+            if busy:
                 if lock_info:
                     project, timestamp = lock_info
                     elapsed = time.time() - timestamp
@@ -221,9 +604,27 @@ def check_slave_available(config: SlaveConfig) -> tuple[bool, Optional[str]]:
 
 
 def find_available_slave(slaves: list[SlaveConfig]) -> Optional[SlaveConfig]:
-    """Find first available slave from the list."""
-    for slave in slaves:
-        available, _ = check_slave_available(slave)
-        if available:
-            return slave
-    return None
+    """Probe slaves concurrently and return the first available one in list order.
+
+    Returns as soon as every slave before an available one has been probed,
+    without waiting for the slaves after it.
+    """
+    if not slaves:
+        return None
+
+    pool = ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(slaves)))
+    futures = {pool.submit(check_slave_available, slave): i for i, slave in enumerate(slaves)}
+    available: list[Optional[bool]] = [None] * len(slaves)
+    next_index = 0
+    try:
+        for future in as_completed(futures):
+            available[futures[future]] = future.result()[0]
+            while next_index < len(slaves) and available[next_index] is not None:
+                if available[next_index]:
+                    return slaves[next_index]
+                next_index += 1
+        return None
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)